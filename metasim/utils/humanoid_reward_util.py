@@ -1,24 +1,38 @@
 """Utility functions for humanoid reward functions."""
 
-import warnings
+import functools
+import math
 
 import numpy as np
 import torch
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 # The value returned by tolerance() at `margin` distance from `bounds` interval.
 _DEFAULT_VALUE_AT_MARGIN = 0.1
 
+# Arrays with at least this many elements are evaluated by the Numba kernels when Numba is installed; below it,
+# thread start-up outweighs the saved temporaries.
+_NUMBA_MIN_SIZE = 4096
 
-def _sigmoids(x, value_at_1, sigmoid):
-    """Returns 1 when `x` == 0, between 0 and 1 otherwise.
+
+# Sigmoid types, in the order of the per-type dispatch tables below.
+_SIGMOID_KINDS = ("gaussian", "hyperbolic", "long_tail", "reciprocal", "cosine", "linear", "quadratic", "tanh_squared")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_scale(sigmoid, value_at_1):
+    """Returns the scale applied to `x` so that `sigmoid` evaluates to `value_at_1` at `x` == 1.
 
     Args:
-      x: A scalar or numpy array.
-      value_at_1: A float between 0 and 1 specifying the output when `x` == 1.
       sigmoid: String, choice of sigmoid type.
+      value_at_1: A float between 0 and 1 specifying the output when `x` == 1.
 
     Returns:
-      A numpy array with values between 0.0 and 1.0.
+      A tuple of the float scale factor and the index of `sigmoid` in the dispatch tables.
 
     Raises:
       ValueError: If not 0 < `value_at_1` < 1, except for `linear`, `cosine` and
@@ -33,46 +47,302 @@ def _sigmoids(x, value_at_1, sigmoid):
             raise ValueError(f"`value_at_1` must be strictly between 0 and 1, got {value_at_1}.")
 
     if sigmoid == "gaussian":
-        scale = np.sqrt(-2 * np.log(value_at_1))
-        return np.exp(-0.5 * (x * scale) ** 2)
-
+        scale = math.sqrt(-2 * math.log(value_at_1))
     elif sigmoid == "hyperbolic":
-        scale = np.arccosh(1 / value_at_1)
-        return 1 / np.cosh(x * scale)
-
+        scale = math.acosh(1 / value_at_1)
     elif sigmoid == "long_tail":
-        scale = np.sqrt(1 / value_at_1 - 1)
-        return 1 / ((x * scale) ** 2 + 1)
-
+        scale = math.sqrt(1 / value_at_1 - 1)
     elif sigmoid == "reciprocal":
         scale = 1 / value_at_1 - 1
-        return 1 / (abs(x) * scale + 1)
-
     elif sigmoid == "cosine":
-        scale = np.arccos(2 * value_at_1 - 1) / np.pi
-        scaled_x = x * scale
-        with warnings.catch_warnings():
-            warnings.filterwarnings(action="ignore", message="invalid value encountered in cos")
-            cos_pi_scaled_x = np.cos(np.pi * scaled_x)
-        return np.where(abs(scaled_x) < 1, (1 + cos_pi_scaled_x) / 2, 0.0)
-
+        scale = math.acos(2 * value_at_1 - 1) / math.pi
     elif sigmoid == "linear":
         scale = 1 - value_at_1
-        scaled_x = x * scale
-        return np.where(abs(scaled_x) < 1, 1 - scaled_x, 0.0)
-
     elif sigmoid == "quadratic":
-        scale = np.sqrt(1 - value_at_1)
-        scaled_x = x * scale
-        return np.where(abs(scaled_x) < 1, 1 - scaled_x**2, 0.0)
-
+        scale = math.sqrt(1 - value_at_1)
     elif sigmoid == "tanh_squared":
-        scale = np.arctanh(np.sqrt(1 - value_at_1))
-        return 1 - np.tanh(x * scale) ** 2
-
+        scale = math.atanh(math.sqrt(1 - value_at_1))
     else:
         raise ValueError(f"Unknown sigmoid type {sigmoid!r}.")
 
+    return scale, _SIGMOID_KINDS.index(sigmoid)
+
+
+def _specialize_default(sigmoid_fns):
+    """Binds every sigmoid in the dispatch table `sigmoid_fns` to its scale for the default `value_at_margin`."""
+    specialized = {}
+    for sigmoid in _SIGMOID_KINDS:
+        scale, kind = _get_scale(sigmoid, _DEFAULT_VALUE_AT_MARGIN)
+        specialized[sigmoid] = functools.partial(sigmoid_fns[kind], scale=scale)
+    return specialized
+
+
+def _scaled(x, scale):
+    """Returns `x * scale` in a freshly allocated array that the sigmoids below then update in place."""
+    out = np.empty(np.shape(x), dtype=np.result_type(x, scale))
+    return np.multiply(x, scale, out=out)
+
+
+def _gaussian(x, scale):
+    out = _scaled(x, scale)
+    np.square(out, out=out)
+    np.multiply(out, -0.5, out=out)
+    return np.exp(out, out=out)
+
+
+def _hyperbolic(x, scale):
+    out = _scaled(x, scale)
+    np.cosh(out, out=out)
+    return np.reciprocal(out, out=out)
+
+
+def _long_tail(x, scale):
+    out = _scaled(x, scale)
+    np.square(out, out=out)
+    np.add(out, 1, out=out)
+    return np.reciprocal(out, out=out)
+
+
+def _reciprocal(x, scale):
+    out = _scaled(x, scale)
+    np.abs(out, out=out)
+    np.add(out, 1, out=out)
+    return np.reciprocal(out, out=out)
+
+
+def _cosine(x, scale):
+    out = _scaled(x, scale)
+    # `fmin`/`fmax` map NaN to the clip bound, so NaN inputs evaluate to 0 like out-of-range ones.
+    np.fmin(out, 1.0, out=out)
+    np.fmax(out, -1.0, out=out)
+    np.multiply(out, np.pi, out=out)
+    np.cos(out, out=out)
+    np.add(out, 1, out=out)
+    return np.multiply(out, 0.5, out=out)
+
+
+def _linear(x, scale):
+    out = _scaled(x, scale)
+    np.subtract(1, out, out=out)
+    return np.fmax(out, 0.0, out=out)
+
+
+def _quadratic(x, scale):
+    out = _scaled(x, scale)
+    np.square(out, out=out)
+    np.subtract(1, out, out=out)
+    return np.fmax(out, 0.0, out=out)
+
+
+def _tanh_squared(x, scale):
+    # 1 - tanh(z)**2 == 1 / cosh(z)**2, which saves a pass and does not cancel catastrophically for large z.
+    out = _scaled(x, scale)
+    with np.errstate(over="ignore"):
+        np.cosh(out, out=out)
+        np.square(out, out=out)
+    return np.reciprocal(out, out=out)
+
+
+_SIGMOID_FNS = (
+    _gaussian,
+    _hyperbolic,
+    _long_tail,
+    _reciprocal,
+    _cosine,
+    _linear,
+    _quadratic,
+    _tanh_squared,
+)
+
+if numba is not None:
+    # Single-pass kernels that write into a preallocated output instead of allocating a temporary per NumPy op.
+    # `nnan`/`ninf` are left out of the fastmath flags so that infinite distances still map to 0.
+    _NUMBA_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _gaussian_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            scaled_x = x[i] * scale
+            out[i] = math.exp(-0.5 * scaled_x * scaled_x)
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _hyperbolic_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            out[i] = 1 / math.cosh(x[i] * scale)
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _long_tail_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            scaled_x = x[i] * scale
+            out[i] = 1 / (scaled_x * scaled_x + 1)
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _reciprocal_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            out[i] = 1 / (abs(x[i]) * scale + 1)
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _cosine_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            scaled_x = x[i] * scale
+            out[i] = 0.5 * (1 + math.cos(math.pi * scaled_x)) if abs(scaled_x) < 1 else 0.0
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _linear_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            scaled_x = x[i] * scale
+            out[i] = 1 - scaled_x if abs(scaled_x) < 1 else 0.0
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _quadratic_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            scaled_x = x[i] * scale
+            out[i] = 1 - scaled_x * scaled_x if abs(scaled_x) < 1 else 0.0
+
+    @numba.njit(parallel=True, fastmath=_NUMBA_FASTMATH)
+    def _tanh_squared_numba(x, scale, out):
+        for i in numba.prange(x.size):
+            cosh_scaled_x = math.cosh(x[i] * scale)
+            out[i] = 1 / (cosh_scaled_x * cosh_scaled_x)
+
+    _NUMBA_SIGMOID_KERNELS = (
+        _gaussian_numba,
+        _hyperbolic_numba,
+        _long_tail_numba,
+        _reciprocal_numba,
+        _cosine_numba,
+        _linear_numba,
+        _quadratic_numba,
+        _tanh_squared_numba,
+    )
+
+    def _with_numba_kernel(numpy_fn, numba_kernel):
+        """Wraps a NumPy sigmoid so that large float arrays are dispatched to its Numba kernel."""
+
+        @functools.wraps(numpy_fn)
+        def sigmoid_fn(x, scale):
+            if isinstance(x, np.ndarray) and x.dtype in (np.float32, np.float64) and x.size >= _NUMBA_MIN_SIZE:
+                x = np.ascontiguousarray(x)
+                out = np.empty(x.shape, dtype=x.dtype)
+                numba_kernel(x.reshape(-1), scale, out.reshape(-1))
+                return out
+            return numpy_fn(x, scale)
+
+        return sigmoid_fn
+
+    _SIGMOID_FNS = tuple(map(_with_numba_kernel, _SIGMOID_FNS, _NUMBA_SIGMOID_KERNELS))
+
+    def _tolerance_gaussian_kernel(x, lower, upper, margin, scale, out):
+        # Fuses the bound distance and the gaussian sigmoid, the most common tolerance in humanoid rewards,
+        # into a single loop over `x`.
+        for i in numba.prange(x.size):
+            # The bounds check also keeps an infinite `x` on an infinite bound, where `inf - inf` is NaN, at 1.
+            if lower <= x[i] <= upper:
+                out[i] = 1.0
+            else:
+                scaled_d = max(lower - x[i], x[i] - upper) / margin * scale
+                out[i] = math.exp(-0.5 * scaled_d * scaled_d)
+
+    _tolerance_gaussian_serial = numba.njit(_tolerance_gaussian_kernel, parallel=False, fastmath=_NUMBA_FASTMATH)
+    _tolerance_gaussian_parallel = numba.njit(_tolerance_gaussian_kernel, parallel=True, fastmath=_NUMBA_FASTMATH)
+
+    def _tolerance_gaussian(x, lower, upper, margin, scale):
+        """Same as `tolerance` with a gaussian sigmoid and `margin > 0`, for a float64 numpy array `x`."""
+        x = np.asarray(x, order="C")
+        out = np.empty(x.shape)
+        kernel = _tolerance_gaussian_parallel if x.size >= _NUMBA_MIN_SIZE else _tolerance_gaussian_serial
+        kernel(x.reshape(-1), float(lower), float(upper), float(margin), scale, out.reshape(-1))
+        return out
+
+
+# Sigmoids specialized at import time for the default `value_at_margin`, skipping the scale computation per call.
+_SIGMOID_FNS_DEFAULT = _specialize_default(_SIGMOID_FNS)
+
+
+# Pure-Python counterparts of the sigmoids above for scalar inputs, which avoid NumPy's 0-d array machinery.
+# They assume a non-negative `x`, as produced by `tolerance`, and are written to never raise `OverflowError`.
+def _gaussian_scalar(x, scale):
+    scaled_x = x * scale
+    return math.exp(-0.5 * scaled_x * scaled_x)
+
+
+def _hyperbolic_scalar(x, scale):
+    exp_neg = math.exp(-x * scale)
+    return 2 * exp_neg / (1 + exp_neg * exp_neg)
+
+
+def _long_tail_scalar(x, scale):
+    scaled_x = x * scale
+    return 1 / (scaled_x * scaled_x + 1)
+
+
+def _reciprocal_scalar(x, scale):
+    return 1 / (x * scale + 1)
+
+
+def _cosine_scalar(x, scale):
+    scaled_x = x * scale
+    return 0.5 * (1 + math.cos(math.pi * scaled_x)) if abs(scaled_x) < 1 else 0.0
+
+
+def _linear_scalar(x, scale):
+    scaled_x = x * scale
+    return 1 - scaled_x if abs(scaled_x) < 1 else 0.0
+
+
+def _quadratic_scalar(x, scale):
+    scaled_x = x * scale
+    return 1 - scaled_x * scaled_x if abs(scaled_x) < 1 else 0.0
+
+
+def _tanh_squared_scalar(x, scale):
+    exp_neg = math.exp(-x * scale)
+    sech = 2 * exp_neg / (1 + exp_neg * exp_neg)
+    return sech * sech
+
+
+_SCALAR_SIGMOID_FNS = (
+    _gaussian_scalar,
+    _hyperbolic_scalar,
+    _long_tail_scalar,
+    _reciprocal_scalar,
+    _cosine_scalar,
+    _linear_scalar,
+    _quadratic_scalar,
+    _tanh_squared_scalar,
+)
+
+_SCALAR_SIGMOID_FNS_DEFAULT = _specialize_default(_SCALAR_SIGMOID_FNS)
+
+
+def _sigmoids(x, value_at_1, sigmoid):
+    """Returns 1 when `x` == 0, between 0 and 1 otherwise.
+
+    Args:
+      x: A scalar or numpy array.
+      value_at_1: A float between 0 and 1 specifying the output when `x` == 1.
+      sigmoid: String, choice of sigmoid type.
+
+    Returns:
+      A numpy array with values between 0.0 and 1.0.
+
+    Raises:
+      ValueError: If not 0 < `value_at_1` < 1, except for `linear`, `cosine` and
+        `quadratic` sigmoids which allow `value_at_1` == 0.
+      ValueError: If `sigmoid` is of an unknown type.
+    """
+    scale, kind = _get_scale(sigmoid, value_at_1)
+    return _SIGMOID_FNS[kind](x, scale)
+
+
+def _bound_distance(x, lower, upper):
+    """Distance from `x` to the nearest of the scalar or array bounds, zero inside the bounds."""
+    d = np.maximum(np.maximum(lower - x, x - upper), 0.0)
+    if np.any(np.isinf(lower)) or np.any(np.isinf(upper)):
+        # An infinite `x` on an infinite bound gives `inf - inf` = NaN, but lies inside the bounds.
+        d = np.where(np.logical_and(lower <= x, x <= upper), 0.0, d)
+    return d
+
 
 def tolerance(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_margin=_DEFAULT_VALUE_AT_MARGIN):
     """Returns 1 when `x` falls inside the bounds, between 0 and 1 otherwise.
@@ -90,7 +360,8 @@ def tolerance(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_mar
         * If `margin > 0` then the output will decrease sigmoidally with
           increasing distance from the nearest bound.
       sigmoid: String, choice of sigmoid type. Valid values are: 'gaussian',
-         'linear', 'hyperbolic', 'long_tail', 'cosine', 'tanh_squared'.
+         'linear', 'hyperbolic', 'long_tail', 'reciprocal', 'cosine',
+         'quadratic', 'tanh_squared'.
       value_at_margin: A float between 0 and 1 specifying the output value when
         the distance from `x` to the nearest bound is equal to `margin`. Ignored
         if `margin == 0`.
@@ -108,82 +379,215 @@ def tolerance(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_mar
     if margin < 0:
         raise ValueError("`margin` must be non-negative.")
 
-    in_bounds = np.logical_and(lower <= x, x <= upper)
+    if isinstance(x, (int, float)):
+        return _tolerance_scalar(x, lower, upper, margin, sigmoid, value_at_margin)
+    # Array-likes such as torch tensors are converted once, so that the sigmoids get a real NumPy dtype to allocate
+    # their output buffers with.
+    is_scalar = np.isscalar(x)
+    x = np.asarray(x)
+    if (
+        numba is not None
+        and sigmoid == "gaussian"
+        and margin > 0
+        and isinstance(x, np.ndarray)
+        and x.dtype == np.float64
+    ):
+        scale, _ = _get_scale(sigmoid, value_at_margin)
+        return _tolerance_gaussian(x, lower, upper, margin, scale)
+
     if margin == 0:
+        in_bounds = np.logical_and(lower <= x, x <= upper)
         value = np.where(in_bounds, 1.0, 0.0)
     else:
-        d = np.where(x < lower, lower - x, x - upper) / margin
-        value = np.where(in_bounds, 1.0, _sigmoids(d, value_at_margin, sigmoid))
+        # Every sigmoid evaluates to 1 at the zero distance inside the bounds.
+        d = _bound_distance(x, lower, upper) / margin
+        sigmoid_fn = _SIGMOID_FNS_DEFAULT.get(sigmoid) if value_at_margin == _DEFAULT_VALUE_AT_MARGIN else None
+        value = sigmoid_fn(d) if sigmoid_fn is not None else _sigmoids(d, value_at_margin, sigmoid)
 
-    return float(value) if np.isscalar(x) else value
+    return float(value) if is_scalar else value
 
 
-def _sigmoids_tensor(x, value_at_1, sigmoid):
-    """Returns 1 when `x` == 0, between 0 and 1 otherwise.
+def _tolerance_scalar(x, lower, upper, margin, sigmoid, value_at_margin):
+    """Same as `tolerance` for a Python scalar `x`, using the `math` module instead of NumPy."""
+    if lower <= x <= upper:
+        return 1.0
+    if margin == 0:
+        return 0.0
+
+    d = max(lower - x, x - upper) / margin
+    sigmoid_fn = _SCALAR_SIGMOID_FNS_DEFAULT.get(sigmoid) if value_at_margin == _DEFAULT_VALUE_AT_MARGIN else None
+    if sigmoid_fn is not None:
+        return sigmoid_fn(d)
+    scale, kind = _get_scale(sigmoid, value_at_margin)
+    return _SCALAR_SIGMOID_FNS[kind](d, scale)
+
+
+def tolerance_batch(x, lowers, uppers, margins, sigmoid="gaussian", value_at_margin=_DEFAULT_VALUE_AT_MARGIN):
+    """Evaluates `tolerance` for many reward terms sharing one sigmoid type in a single NumPy pass.
+
+    The bounds and margins of all terms are given as arrays (typically collected once at initialization), so
+    that a reward with many tolerance terms pays the Python overhead once per step instead of once per term.
 
     Args:
-      x: A scalar or numpy array.
-      value_at_1: A float between 0 and 1 specifying the output when `x` == 1.
-      sigmoid: String, choice of sigmoid type.
+      x: A numpy array broadcastable against `lowers`, `uppers` and `margins`.
+      lowers: A numpy array of inclusive lower bounds, one per term. Can be `-inf`.
+      uppers: A numpy array of inclusive upper bounds, one per term. Can be `inf`.
+      margins: A numpy array of non-negative margins, one per term. A zero margin
+        gives an output of 0 for all values of `x` outside of the bounds, as in
+        `tolerance`.
+      sigmoid: String, choice of sigmoid type, shared by all terms. Same valid
+        values as in `tolerance`.
+      value_at_margin: A float between 0 and 1 specifying the output value when
+        the distance from `x` to the nearest bound is equal to the margin.
 
     Returns:
-      A numpy array with values between 0.0 and 1.0.
+      A numpy array with values between 0.0 and 1.0, of the broadcast shape of
+      the inputs.
 
     Raises:
-      ValueError: If not 0 < `value_at_1` < 1, except for `linear`, `cosine` and
-        `quadratic` sigmoids which allow `value_at_1` == 0.
-      ValueError: If `sigmoid` is of an unknown type.
+      ValueError: If any lower bound is greater than its upper bound.
+      ValueError: If any margin is negative.
+
+    Example:
+
+        .. code-block:: python
+
+            # Same as stacking tolerance(x[:, 0], bounds=(0.6, 1.0), margin=1.0),
+            # tolerance(x[:, 1], bounds=(1.0, float("inf")), margin=1.0) and
+            # tolerance(x[:, 2], bounds=(-1.0, 1.0), margin=0.0) along the last axis.
+            lowers = np.array([0.6, 1.0, -1.0])
+            uppers = np.array([1.0, np.inf, 1.0])
+            margins = np.array([1.0, 1.0, 0.0])
+            values = tolerance_batch(x, lowers, uppers, margins)  # x has shape (num_envs, 3)
     """
-    if sigmoid in ("cosine", "linear", "quadratic"):
-        if not 0 <= value_at_1 < 1:
-            raise ValueError(f"`value_at_1` must be nonnegative and smaller than 1, got {value_at_1}.")
-    else:
-        if not 0 < value_at_1 < 1:
-            raise ValueError(f"`value_at_1` must be strictly between 0 and 1, got {value_at_1}.")
+    x = np.asarray(x)
+    lowers, uppers, margins = np.asarray(lowers), np.asarray(uppers), np.asarray(margins)
+    if np.any(lowers > uppers):
+        raise ValueError("Lower bounds must be <= upper bounds.")
+    if np.any(margins < 0):
+        raise ValueError("`margins` must be non-negative.")
 
-    if sigmoid == "gaussian":
-        scale = torch.sqrt(-2 * torch.log(value_at_1))
-        return torch.exp(-0.5 * (x * scale) ** 2)
+    d = _bound_distance(x, lowers, uppers)
+    # Out-of-bounds distances over a zero margin become inf, which every sigmoid maps to 0. NaN distances are
+    # divided too, so that NaN observations propagate as in `tolerance`.
+    with np.errstate(divide="ignore"):
+        d = np.divide(d, margins, out=np.zeros_like(d), where=~(d <= 0))
+    if np.any(margins == 0):
+        # Zero-margin terms are an in-bounds indicator in `tolerance`, which is 0 for NaN observations.
+        d = np.where(margins == 0, np.where(d <= 0, 0.0, np.inf), d)
 
-    elif sigmoid == "hyperbolic":
-        scale = torch.arccosh(1 / value_at_1)
-        return 1 / torch.cosh(x * scale)
+    scale, kind = _get_scale(sigmoid, value_at_margin)
+    return _SIGMOID_FNS[kind](d, scale)
 
-    elif sigmoid == "long_tail":
-        scale = torch.sqrt(1 / value_at_1 - 1)
-        return 1 / ((x * scale) ** 2 + 1)
 
-    elif sigmoid == "reciprocal":
-        scale = 1 / value_at_1 - 1
-        return 1 / (abs(x) * scale + 1)
+# One compiled kernel per sigmoid type, so that the branch on `sigmoid` is resolved outside of the
+# traced graph and each kernel fuses into a single pointwise launch.
+@torch.compile(fullgraph=True, dynamic=True)
+def _gaussian_tensor(x, scale):
+    t = torch.mul(x, scale)
+    t.square_()
+    t.mul_(-0.5)
+    return t.exp_()
 
-    elif sigmoid == "cosine":
-        scale = torch.arccos(2 * value_at_1 - 1) / torch.pi
-        scaled_x = x * scale
-        with warnings.catch_warnings():
-            warnings.filterwarnings(action="ignore", message="invalid value encountered in cos")
-            cos_pi_scaled_x = torch.cos(torch.pi * scaled_x)
-        return np.where(abs(scaled_x) < 1, (1 + cos_pi_scaled_x) / 2, 0.0)
 
-    elif sigmoid == "linear":
-        scale = 1 - value_at_1
-        scaled_x = x * scale
-        return torch.where(abs(scaled_x) < 1, 1 - scaled_x, 0.0)
+@torch.compile(fullgraph=True, dynamic=True)
+def _hyperbolic_tensor(x, scale):
+    t = torch.mul(x, scale)
+    t.cosh_()
+    return t.reciprocal_()
 
-    elif sigmoid == "quadratic":
-        scale = torch.sqrt(1 - value_at_1)
-        scaled_x = x * scale
-        return torch.where(abs(scaled_x) < 1, 1 - scaled_x**2, 0.0)
 
-    elif sigmoid == "tanh_squared":
-        scale = torch.arctanh(torch.sqrt(1 - value_at_1))
-        return 1 - torch.tanh(x * scale) ** 2
+@torch.compile(fullgraph=True, dynamic=True)
+def _long_tail_tensor(x, scale):
+    t = torch.mul(x, scale)
+    t.square_()
+    t.add_(1)
+    return t.reciprocal_()
+
+
+@torch.compile(fullgraph=True, dynamic=True)
+def _reciprocal_tensor(x, scale):
+    t = torch.abs(x)
+    t.mul_(scale)
+    t.add_(1)
+    return t.reciprocal_()
 
-    else:
-        raise ValueError(f"Unknown sigmoid type {sigmoid!r}.")
 
+@torch.compile(fullgraph=True, dynamic=True)
+def _cosine_tensor(x, scale):
+    scaled_x = x * scale
+    return torch.where(abs(scaled_x) < 1, 0.5 * (1 + torch.cos(torch.pi * scaled_x)), 0.0)
 
-def tolerance_tensor(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_margin=_DEFAULT_VALUE_AT_MARGIN):
+
+@torch.compile(fullgraph=True, dynamic=True)
+def _linear_tensor(x, scale):
+    scaled_x = x * scale
+    return torch.where(abs(scaled_x) < 1, 1 - scaled_x, 0.0)
+
+
+@torch.compile(fullgraph=True, dynamic=True)
+def _quadratic_tensor(x, scale):
+    scaled_x = x * scale
+    return torch.where(abs(scaled_x) < 1, 1 - scaled_x**2, 0.0)
+
+
+@torch.compile(fullgraph=True, dynamic=True)
+def _tanh_squared_tensor(x, scale):
+    t = torch.mul(x, scale)
+    t.cosh_()
+    t.square_()
+    return t.reciprocal_()
+
+
+_SIGMOID_TENSOR_FNS = (
+    _gaussian_tensor,
+    _hyperbolic_tensor,
+    _long_tail_tensor,
+    _reciprocal_tensor,
+    _cosine_tensor,
+    _linear_tensor,
+    _quadratic_tensor,
+    _tanh_squared_tensor,
+)
+
+_SIGMOID_TENSOR_FNS_DEFAULT = _specialize_default(_SIGMOID_TENSOR_FNS)
+
+
+def _sigmoids_tensor(x, value_at_1, sigmoid):
+    """Returns 1 when `x` == 0, between 0 and 1 otherwise.
+
+    Args:
+      x: A torch tensor.
+      value_at_1: A float between 0 and 1 specifying the output when `x` == 1.
+      sigmoid: String, choice of sigmoid type.
+
+    Returns:
+      A torch tensor with values between 0.0 and 1.0.
+
+    Raises:
+      ValueError: If not 0 < `value_at_1` < 1, except for `linear`, `cosine` and
+        `quadratic` sigmoids which allow `value_at_1` == 0.
+      ValueError: If `sigmoid` is of an unknown type.
+    """
+    # Dynamo cannot trace through the `lru_cache` wrapper; call the plain function so that a caller compiled with
+    # `fullgraph=True` constant-folds the scale and inlines the kernel into its own graph.
+    get_scale = _get_scale.__wrapped__ if torch.compiler.is_compiling() else _get_scale
+    scale, kind = get_scale(sigmoid, value_at_1)
+    return _SIGMOID_TENSOR_FNS[kind](x, scale)
+
+
+def _bound_distance_tensor(x, lower, upper):
+    """Distance from the tensor `x` to the nearest of the float bounds, zero inside the bounds."""
+    dd = torch.clamp_min(torch.maximum(lower - x, x - upper), 0.0)
+    if math.isinf(lower) or math.isinf(upper):
+        # An infinite `x` on an infinite bound gives `inf - inf` = NaN, but lies inside the bounds.
+        dd = torch.where(torch.logical_and(lower <= x, x <= upper), 0.0, dd)
+    return dd
+
+
+def tolerance_tensor(
+    x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_margin=_DEFAULT_VALUE_AT_MARGIN, dtype=None
+):
     """Returns 1 when `x` falls inside the bounds, between 0 and 1 otherwise.
 
     Args:
@@ -199,10 +603,16 @@ def tolerance_tensor(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value
         * If `margin > 0` then the output will decrease sigmoidally with
           increasing distance from the nearest bound.
       sigmoid: String, choice of sigmoid type. Valid values are: 'gaussian',
-         'linear', 'hyperbolic', 'long_tail', 'cosine', 'tanh_squared'.
+         'linear', 'hyperbolic', 'long_tail', 'reciprocal', 'cosine',
+         'quadratic', 'tanh_squared'.
       value_at_margin: A float between 0 and 1 specifying the output value when
         the distance from `x` to the nearest bound is equal to `margin`. Ignored
         if `margin == 0`.
+      dtype: Optional torch dtype to evaluate in, e.g. `torch.bfloat16` or
+        `torch.float16` to halve memory traffic for large batches. The
+        half-precision rounding of `x` is amplified by roughly the sigmoid's
+        slope, i.e. `scale / margin`, so steep sigmoids such as 'reciprocal'
+        and small margins lose the most accuracy. If None, `x` is used as is.
 
     Returns:
       A float or numpy array with values between 0.0 and 1.0.
@@ -211,19 +621,116 @@ def tolerance_tensor(x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value
       ValueError: If `bounds[0] > bounds[1]`.
       ValueError: If `margin` is negative.
     """
-    lower, upper = bounds
+    # Plain Python floats are passed to the kernels as scalar arguments, so no constants are uploaded per call.
+    lower, upper, margin = float(bounds[0]), float(bounds[1]), float(margin)
     if lower > upper:
         raise ValueError("Lower bound must be <= upper bound.")
     if margin < 0:
         raise ValueError("`margin` must be non-negative.")
 
-    in_bounds = torch.logical_and(lower <= x, x <= upper)
+    if dtype is not None:
+        x = x.to(dtype)
+
     if margin == 0:
-        value = torch.where(in_bounds, 1.0, 0.0)
+        in_bounds = torch.logical_and(lower <= x, x <= upper)
+        value = in_bounds.to(torch.get_default_dtype() if dtype is None else dtype)
     else:
-        dd = torch.where(x < lower, lower - x, x - upper) / margin
-        value = torch.where(
-            in_bounds, 1.0, _sigmoids_tensor(dd, torch.tensor(value_at_margin, device=x.device), sigmoid)
-        )
+        # Every sigmoid evaluates to 1 at the zero distance inside the bounds.
+        dd = _bound_distance_tensor(x, lower, upper) / margin
+        sigmoid_fn = _SIGMOID_TENSOR_FNS_DEFAULT.get(sigmoid) if value_at_margin == _DEFAULT_VALUE_AT_MARGIN else None
+        if sigmoid_fn is not None:
+            value = sigmoid_fn(dd)
+        else:
+            value = _sigmoids_tensor(dd, value_at_margin, sigmoid)
 
     return value
+
+
+def tolerance_fast_params(margin, sigmoid="gaussian", value_at_margin=_DEFAULT_VALUE_AT_MARGIN):
+    """Precomputes the per-term arguments of `tolerance_tensor_fast`.
+
+    Args:
+      margin: Positive float, same as in `tolerance_tensor`.
+      sigmoid: String, choice of sigmoid type. Same valid values as in
+        `tolerance_tensor`.
+      value_at_margin: Same as in `tolerance_tensor`.
+
+    Returns:
+      A tuple `(inv_margin, scale, kind)` to pass to `tolerance_tensor_fast`.
+
+    Raises:
+      ValueError: If `margin` is not positive.
+    """
+    if not margin > 0:
+        raise ValueError("`margin` must be positive.")
+    scale, kind = _get_scale(sigmoid, value_at_margin)
+    return 1 / margin, scale, kind
+
+
+def tolerance_tensor_fast(x, lower, upper, inv_margin, scale, kind):
+    """Same as `tolerance_tensor` with `margin > 0`, for arguments precomputed by `tolerance_fast_params`.
+
+    Skips argument validation, the sigmoid name lookup and the bounds tuple, which matters for reward terms
+    evaluated every step.
+
+    Args:
+      x: A torch tensor.
+      lower: Float inclusive lower bound. Can be `-inf`.
+      upper: Float inclusive upper bound, not smaller than `lower`. Can be `inf`.
+      inv_margin: Float, `1 / margin`.
+      scale: Float sigmoid scale, from `tolerance_fast_params`.
+      kind: Integer sigmoid type, from `tolerance_fast_params`.
+
+    Returns:
+      A torch tensor with values between 0.0 and 1.0.
+    """
+    return _SIGMOID_TENSOR_FNS[kind](_bound_distance_tensor(x, lower, upper) * inv_margin, scale)
+
+
+def make_tolerance_graph(
+    sample_x, bounds=(0.0, 0.0), margin=0.0, sigmoid="gaussian", value_at_margin=_DEFAULT_VALUE_AT_MARGIN
+):
+    """Captures `tolerance_tensor` for a fixed CUDA input shape into a CUDA graph.
+
+    In massively parallel environments the same tolerance term is evaluated every step on tensors of the same
+    shape, and kernel launch latency dominates. Replaying a captured graph issues all of its kernels at once.
+
+    Args:
+      sample_x: A CUDA tensor with the shape, dtype and device of the inputs the
+        graph will be replayed on.
+      bounds: Same as in `tolerance_tensor`.
+      margin: Same as in `tolerance_tensor`.
+      sigmoid: Same as in `tolerance_tensor`.
+      value_at_margin: Same as in `tolerance_tensor`.
+
+    Returns:
+      A callable taking a tensor like `sample_x` and returning the tolerance
+      values. The returned tensor is a static graph output that is overwritten
+      by the next call; clone it if it must outlive the step.
+
+    Raises:
+      ValueError: If `sample_x` is not a CUDA tensor.
+    """
+    if not sample_x.is_cuda:
+        raise ValueError("CUDA graphs require `sample_x` to be a CUDA tensor.")
+
+    static_x = sample_x.clone()
+
+    # Warm up on a side stream so that compilation and allocations happen before capture.
+    stream = torch.cuda.Stream()
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream):
+        for _ in range(3):
+            tolerance_tensor(static_x, bounds, margin, sigmoid, value_at_margin)
+    torch.cuda.current_stream().wait_stream(stream)
+
+    graph = torch.cuda.CUDAGraph()
+    with torch.cuda.graph(graph):
+        static_out = tolerance_tensor(static_x, bounds, margin, sigmoid, value_at_margin)
+
+    def tolerance_graph(x):
+        static_x.copy_(x)
+        graph.replay()
+        return static_out
+
+    return tolerance_graph